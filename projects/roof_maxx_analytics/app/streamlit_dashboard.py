@@ -1,8 +1,10 @@
+from dataclasses import dataclass
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
+from plotly.colors import sequential
 from datetime import datetime, timedelta
 
 st.set_page_config(
@@ -11,8 +13,9 @@ st.set_page_config(
     layout="wide"
 )
 
-# Custom CSS
-st.markdown("""
+# Custom CSS - emitted every run (elements not re-emitted are dropped from
+# the page), but through st.html so it skips the markdown parser
+st.html("""
 <style>
 .metric-card {
     background-color: #f0f2f6;
@@ -25,46 +28,303 @@ st.markdown("""
     font-weight: bold;
 }
 </style>
-""", unsafe_allow_html=True)
+""")
 
 st.title("🏠 Roof Maxx Market Analytics Dashboard")
 st.markdown("### Real-time Sales Intelligence & Predictive Analytics")
 
-# Sidebar filters
+# Sidebar filters - keyed so tab fragments can read them from
+# st.session_state once a tab uses them
 st.sidebar.header("🎯 Territory Settings")
-territory = st.sidebar.selectbox(
+st.sidebar.selectbox(
     "Select Territory",
     ["Washington - King County", "Washington - Pierce County",
      "Washington - Snohomish County", "Canada - British Columbia",
-     "Canada - Ontario", "Canada - Alberta"]
+     "Canada - Ontario", "Canada - Alberta"],
+    key='territory'
 )
 
-date_range = st.sidebar.date_input(
+st.sidebar.date_input(
     "Analysis Period",
-    value=(datetime.now() - timedelta(days=90), datetime.now())
+    value=(datetime.now() - timedelta(days=90), datetime.now()),
+    key='date_range'
 )
 
 # Marketing Budget Input
 st.sidebar.header("💰 Marketing Investment")
-monthly_marketing = st.sidebar.number_input(
+st.sidebar.number_input(
     "Monthly Marketing Budget ($)",
     min_value=1000,
     max_value=50000,
     value=5000,
-    step=500
+    step=500,
+    key='monthly_marketing'
 )
 
-# Main Dashboard Tabs
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "📊 Executive Dashboard",
-    "🎯 Lead Generation",
-    "🗺️ Territory Analysis",
-    "📈 Predictive Forecasts",
-    "👥 Customer Insights"
-])
+
+# Month labels only change with the date, so build them once a day
+@st.cache_data(ttl=86400)
+def recent_month_labels(n):
+    """Labels for the last n completed month-ends up to today"""
+    return pd.date_range(end=pd.Timestamp.today().normalize(), periods=n,
+                         freq='ME').strftime('%b %Y').tolist()
+
+
+@st.cache_data(ttl=86400)
+def upcoming_month_labels(n):
+    """Labels for the next n month-ends starting from today"""
+    return pd.date_range(start=pd.Timestamp.today().normalize(), periods=n,
+                         freq='ME').strftime('%b %Y').tolist()
+
+
+# Cached data loaders - demo data, rebuilt at most once an hour
+@st.cache_data(ttl=3600)
+def load_trend_data():
+    return pd.DataFrame({
+        'Month': recent_month_labels(6),
+        'Revenue': [198000, 215000, 187000, 223000, 241000, 267000],
+        'Leads': [142, 156, 134, 168, 187, 198],
+        'Conversions': [38, 44, 36, 47, 53, 58]
+    })
+
+
+@st.cache_data(ttl=3600)
+def load_lead_sources():
+    lead_sources = pd.DataFrame({
+        'Source': ['Google Ads', 'SEO/Organic', 'Facebook Ads',
+                  'Referrals', 'Direct Mail', 'Home Shows'],
+        'Leads': [67, 52, 34, 23, 8, 3],
+        'Cost': [3200, 800, 1800, 200, 900, 400],
+        'Conversions': [19, 18, 8, 12, 2, 1]
+    })
+
+    leads = lead_sources['Leads'].to_numpy()
+    cost = lead_sources['Cost'].to_numpy()
+    conversions = lead_sources['Conversions'].to_numpy()
+    return lead_sources.assign(
+        Cost_Per_Lead=cost / leads,
+        Conversion_Rate=np.round(conversions / leads * 100, 1)
+    )
+
+
+@st.cache_data(ttl=3600)
+def lead_summary():
+    """Tab 2 KPI aggregates from one pass over the lead-source arrays"""
+    lead_sources = load_lead_sources()
+    leads = lead_sources['Leads'].to_numpy()
+    conversions = lead_sources['Conversions'].to_numpy()
+    total_leads = int(leads.sum())
+    total_conversions = int(conversions.sum())
+    return dict(
+        total_leads=total_leads,
+        total_conversions=total_conversions,
+        avg_cost_per_lead=float(lead_sources['Cost_Per_Lead'].to_numpy().mean()),
+        overall_conversion=total_conversions / total_leads * 100
+    )
+
+
+@st.cache_data(ttl=3600)
+def load_territory_data():
+    return pd.DataFrame({
+        'Region': ['King County', 'Pierce County', 'Snohomish County', 'Spokane County'],
+        'Market_Size': [400000, 150000, 130000, 90000],
+        'Current_Penetration': [2.5, 1.2, 0.8, 0.3],
+        'Opportunity_Score': [95, 78, 82, 65]
+    })
+
+
+# Seed for the demo forecast noise. Each cache miss draws from a fresh
+# PCG64 Generator rather than a shared one, so a refresh reproduces the same
+# series no matter what else has drawn in between.
+FORECAST_SEED = 42
+
+
+@st.cache_data(ttl=3600)
+def load_forecast_data(n=12):
+    rng = np.random.default_rng(FORECAST_SEED)
+    base = np.linspace(250000, 450000, n)
+    spread = np.linspace(30000, 50000, n)
+    return pd.DataFrame({
+        'Month': upcoming_month_labels(n),
+        'Forecasted_Revenue': base + rng.standard_normal(n) * 20000,
+        'Lower_Bound': base - spread,
+        'Upper_Bound': base + spread
+    })
+
+
+@dataclass(frozen=True)
+class Segments:
+    """Customer segments as parallel arrays - numeric columns stay contiguous"""
+
+    names: list
+    counts: np.ndarray
+    avg_values: np.ndarray
+    actions: list
+
+    def to_frame(self):
+        """Materialize the display table"""
+        return pd.DataFrame({
+            'Segment': self.names,
+            'Count': self.counts,
+            'Avg_Value': self.avg_values,
+            'Action': self.actions
+        })
+
+
+# Held as a resource rather than pickled per rerun like the frame loaders
+@st.cache_resource(ttl=3600)
+def load_segments():
+    return Segments(
+        names=['Champions', 'Loyal', 'Potential Loyalists', 'New Customers', 'At Risk'],
+        counts=np.array([45, 78, 123, 187, 34]),
+        avg_values=np.array([13500, 9000, 4500, 4500, 9000]),
+        actions=['Upsell 2nd/3rd treatment', 'Referral program', 'Encourage reviews',
+                 'Nurture for retention', 'Re-engagement campaign']
+    )
+
+
+# Customer lifetime value inputs are fixed, so the metric strings are
+# formatted once at import
+AVG_TREATMENT_COST = 4500
+TREATMENTS_PER_CUSTOMER = 3
+REFERRAL_RATE = 0.3
+
+CLV_DIRECT = AVG_TREATMENT_COST * TREATMENTS_PER_CUSTOMER
+CLV_REFERRAL = AVG_TREATMENT_COST * REFERRAL_RATE
+CLV_DIRECT_STR = f"${CLV_DIRECT:,.0f}"
+CLV_REFERRAL_STR = f"${CLV_REFERRAL:,.0f}"
+CLV_TOTAL_STR = f"${CLV_DIRECT + CLV_REFERRAL:,.0f}"
+
+# Shared pie colorway, resolved once at import
+BLUES = sequential.Blues
+
+# Summary tiles (funnel, pies) don't need hover/zoom, so render them static
+STATIC_CHART_CONFIG = {'staticPlot': True, 'displayModeBar': False}
+
+# Line charts never ship more points than this to the browser
+MAX_CHART_POINTS = 1000
+
+
+def downsample_lttb(df, y_col, max_points=MAX_CHART_POINTS):
+    """Keep the rows Largest-Triangle-Three-Buckets picks for y_col"""
+    n = len(df)
+    if n <= max_points:
+        return df
+
+    y = df[y_col].to_numpy(dtype=np.float64)
+    x = np.arange(n, dtype=np.float64)
+    # First and last rows are always kept; the rest split into buckets
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    prev = 0
+    for i in range(max_points - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        area = np.abs((x[prev] - avg_x) * (y[start:stop] - y[prev])
+                      - (x[prev] - x[start:stop]) * (avg_y - y[prev]))
+        prev = start + int(area.argmax())
+        keep[i + 1] = prev
+
+    return df.iloc[keep]
+
+
+# Cached figure builders - figures are shared across reruns and sessions
+# (st.plotly_chart only reads them). Builders over the hourly loaders expire
+# with them so date-based labels stay current. plotly.express is imported
+# inside the builders that use it so a warm cache never loads it.
+@st.cache_resource
+def build_funnel_fig():
+    return go.Figure(
+        go.Funnel(
+            y=['Leads', 'Qualified', 'Inspection', 'Proposal', 'Closed'],
+            x=[187, 142, 98, 67, 53],
+            textinfo="value+percent initial"
+        ),
+        layout=go.Layout(height=400)
+    )
+
+
+@st.cache_resource
+def build_revenue_fig():
+    return go.Figure(
+        go.Pie(labels=['First Treatment', 'Second Treatment', 'Third Treatment', 'Commercial'],
+               values=[165000, 52500, 12000, 12000]),
+        layout=go.Layout(piecolorway=BLUES, height=400)
+    )
+
+
+@st.cache_resource(ttl=3600)
+def build_lead_sources_fig():
+    import plotly.express as px
+
+    return px.bar(load_lead_sources(), x='Source', y='Leads',
+                  color='Conversion_Rate',
+                  title='Lead Sources Performance',
+                  color_continuous_scale='Blues')
+
+
+@st.cache_resource(ttl=3600)
+def build_forecast_fig():
+    forecast_data = downsample_lttb(load_forecast_data(), 'Forecasted_Revenue')
+    return go.Figure(
+        data=[
+            go.Scattergl(x=forecast_data['Month'], y=forecast_data['Forecasted_Revenue'],
+                         name='Forecast', mode='lines+markers'),
+            go.Scattergl(x=forecast_data['Month'], y=forecast_data['Upper_Bound'],
+                         fill=None, mode='lines', line_color='lightblue', showlegend=False),
+            go.Scattergl(x=forecast_data['Month'], y=forecast_data['Lower_Bound'],
+                         fill='tonexty', mode='lines', line_color='lightblue', name='Confidence Interval'),
+        ],
+        layout=go.Layout(title='12-Month Revenue Forecast', height=400)
+    )
+
+
+@st.cache_resource(ttl=3600)
+def build_segments_fig():
+    segments = load_segments()
+    return go.Figure(
+        go.Pie(labels=segments.names, values=segments.counts),
+        layout=go.Layout(title='Customer Segments', piecolorway=BLUES)
+    )
+
+
+@st.cache_data
+def build_trend_fig(trend_data):
+    """Revenue bars with lead/conversion lines on a secondary axis"""
+    return go.Figure(
+        data=[
+            go.Bar(x=trend_data['Month'], y=trend_data['Revenue'],
+                   name='Revenue', yaxis='y', marker_color='lightblue'),
+            go.Scattergl(x=trend_data['Month'], y=trend_data['Leads'],
+                         name='Leads', yaxis='y2', marker_color='blue'),
+            go.Scattergl(x=trend_data['Month'], y=trend_data['Conversions'],
+                         name='Conversions', yaxis='y2', marker_color='darkblue'),
+        ],
+        layout=go.Layout(
+            yaxis=dict(title='Revenue ($)'),
+            yaxis2=dict(title='Count', overlaying='y', side='right'),
+            hovermode='x unified',
+            height=400,
+            uirevision='trend'
+        )
+    )
+
+
+def update_trend_fig(fig, trend_data):
+    """Swap new trend data into an existing trend figure in place"""
+    with fig.batch_update():
+        for trace, column in zip(fig.data, ['Revenue', 'Leads', 'Conversions']):
+            trace.x = trend_data['Month']
+            trace.y = trend_data[column]
+
 
 # TAB 1: Executive Dashboard
-with tab1:
+@st.fragment
+def render_executive():
     col1, col2, col3, col4 = st.columns(4)
     
     # KPI Metrics
@@ -103,165 +363,111 @@ with tab1:
     
     with col1:
         st.subheader("Sales Funnel Performance")
-        funnel_data = pd.DataFrame({
-            'Stage': ['Leads', 'Qualified', 'Inspection', 'Proposal', 'Closed'],
-            'Count': [187, 142, 98, 67, 53],
-            'Value': [841500, 639000, 441000, 301500, 238500]
-        })
-        
-        fig = go.Figure(go.Funnel(
-            y=funnel_data['Stage'],
-            x=funnel_data['Count'],
-            textinfo="value+percent initial"
-        ))
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_funnel_fig(), use_container_width=True,
+                        theme=None, config=STATIC_CHART_CONFIG)
     
     with col2:
         st.subheader("Revenue by Service Type")
-        revenue_data = pd.DataFrame({
-            'Service': ['First Treatment', 'Second Treatment', 'Third Treatment', 'Commercial'],
-            'Revenue': [165000, 52500, 12000, 12000]
-        })
-        
-        fig = px.pie(revenue_data, values='Revenue', names='Service',
-                     color_discrete_sequence=px.colors.sequential.Blues)
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_revenue_fig(), use_container_width=True,
+                        theme=None, config=STATIC_CHART_CONFIG)
     
     # Monthly Trend
     st.subheader("Revenue & Lead Trend (Last 6 Months)")
-    months = pd.date_range(end=datetime.now(), periods=6, freq='M')
-    trend_data = pd.DataFrame({
-        'Month': months.strftime('%b %Y'),
-        'Revenue': [198000, 215000, 187000, 223000, 241000, 267000],
-        'Leads': [142, 156, 134, 168, 187, 198],
-        'Conversions': [38, 44, 36, 47, 53, 58]
-    })
-    
-    fig = go.Figure()
-    fig.add_trace(go.Bar(x=trend_data['Month'], y=trend_data['Revenue'],
-                         name='Revenue', yaxis='y', marker_color='lightblue'))
-    fig.add_trace(go.Scatter(x=trend_data['Month'], y=trend_data['Leads'],
-                             name='Leads', yaxis='y2', marker_color='blue'))
-    fig.add_trace(go.Scatter(x=trend_data['Month'], y=trend_data['Conversions'],
-                             name='Conversions', yaxis='y2', marker_color='darkblue'))
-    
-    fig.update_layout(
-        yaxis=dict(title='Revenue ($)'),
-        yaxis2=dict(title='Count', overlaying='y', side='right'),
-        hovermode='x unified',
-        height=400
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    trend_data = downsample_lttb(load_trend_data(), 'Revenue')
+
+    # Keep one figure per session and swap in new data on reruns; uirevision
+    # preserves the user's zoom/pan instead of a full re-layout
+    if 'trend_fig' not in st.session_state:
+        st.session_state.trend_fig = build_trend_fig(trend_data)
+    else:
+        update_trend_fig(st.session_state.trend_fig, trend_data)
+    st.plotly_chart(st.session_state.trend_fig, use_container_width=True)
+
 
 # TAB 2: Lead Generation
-with tab2:
+@st.fragment
+def render_lead_generation():
     st.subheader("🎯 Lead Generation Analytics")
     
     col1, col2 = st.columns([2, 1])
     
+    summary = lead_summary()
+
     with col1:
-        lead_sources = pd.DataFrame({
-            'Source': ['Google Ads', 'SEO/Organic', 'Facebook Ads',
-                      'Referrals', 'Direct Mail', 'Home Shows'],
-            'Leads': [67, 52, 34, 23, 8, 3],
-            'Cost': [3200, 800, 1800, 200, 900, 400],
-            'Conversions': [19, 18, 8, 12, 2, 1]
-        })
-        
-        lead_sources['Cost_Per_Lead'] = lead_sources['Cost'] / lead_sources['Leads']
-        lead_sources['Conversion_Rate'] = (lead_sources['Conversions'] / lead_sources['Leads'] * 100).round(1)
-        
-        fig = px.bar(lead_sources, x='Source', y='Leads', 
-                     color='Conversion_Rate',
-                     title='Lead Sources Performance',
-                     color_continuous_scale='Blues')
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_lead_sources_fig(), use_container_width=True)
     
     with col2:
-        st.metric("Total Leads", lead_sources['Leads'].sum())
-        st.metric("Total Conversions", lead_sources['Conversions'].sum())
-        st.metric("Avg Cost/Lead", f"${lead_sources['Cost_Per_Lead'].mean():.2f}")
-        st.metric("Overall Conversion", f"{(lead_sources['Conversions'].sum() / lead_sources['Leads'].sum() * 100):.1f}%")
+        st.metric("Total Leads", summary['total_leads'])
+        st.metric("Total Conversions", summary['total_conversions'])
+        st.metric("Avg Cost/Lead", f"${summary['avg_cost_per_lead']:.2f}")
+        st.metric("Overall Conversion", f"{summary['overall_conversion']:.1f}%")
+
 
 # TAB 3: Territory Analysis
-with tab3:
+@st.fragment
+def render_territory():
     st.subheader("🗺️ Territory Analysis")
     st.info("Map visualization would go here - requires folium integration")
     
     # Sample territory data
-    territory_data = pd.DataFrame({
-        'Region': ['King County', 'Pierce County', 'Snohomish County', 'Spokane County'],
-        'Market_Size': [400000, 150000, 130000, 90000],
-        'Current_Penetration': [2.5, 1.2, 0.8, 0.3],
-        'Opportunity_Score': [95, 78, 82, 65]
-    })
-    
-    st.dataframe(territory_data, use_container_width=True)
+    st.table(load_territory_data())
+
 
 # TAB 4: Predictive Forecasts
-with tab4:
+@st.fragment
+def render_forecasts():
     st.subheader("📈 Predictive Analytics")
     
     # Simple forecast visualization
-    forecast_months = pd.date_range(start=datetime.now(), periods=12, freq='M')
-    forecast_data = pd.DataFrame({
-        'Month': forecast_months.strftime('%b %Y'),
-        'Forecasted_Revenue': np.linspace(250000, 450000, 12) + np.random.normal(0, 20000, 12),
-        'Lower_Bound': np.linspace(220000, 400000, 12),
-        'Upper_Bound': np.linspace(280000, 500000, 12)
-    })
-    
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=forecast_data['Month'], y=forecast_data['Forecasted_Revenue'],
-                             name='Forecast', mode='lines+markers'))
-    fig.add_trace(go.Scatter(x=forecast_data['Month'], y=forecast_data['Upper_Bound'],
-                             fill=None, mode='lines', line_color='lightblue', showlegend=False))
-    fig.add_trace(go.Scatter(x=forecast_data['Month'], y=forecast_data['Lower_Bound'],
-                             fill='tonexty', mode='lines', line_color='lightblue', name='Confidence Interval'))
-    
-    fig.update_layout(title='12-Month Revenue Forecast', height=400)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(build_forecast_fig(), use_container_width=True)
+
 
 # TAB 5: Customer Insights
-with tab5:
+@st.fragment
+def render_customer_insights():
     st.subheader("👥 Customer Analytics")
     
     # Customer segments
-    segments = pd.DataFrame({
-        'Segment': ['Champions', 'Loyal', 'Potential Loyalists', 'New Customers', 'At Risk'],
-        'Count': [45, 78, 123, 187, 34],
-        'Avg_Value': [13500, 9000, 4500, 4500, 9000],
-        'Action': ['Upsell 2nd/3rd treatment', 'Referral program', 'Encourage reviews', 
-                  'Nurture for retention', 'Re-engagement campaign']
-    })
-    
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = px.pie(segments, values='Count', names='Segment', 
-                     title='Customer Segments',
-                     color_discrete_sequence=px.colors.sequential.Blues)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_segments_fig(), use_container_width=True,
+                        theme=None, config=STATIC_CHART_CONFIG)
     
     with col2:
-        st.dataframe(segments, use_container_width=True)
+        st.table(load_segments().to_frame().style.format({'Avg_Value': '${:,.0f}'}))
     
     # CLV Calculation
     st.subheader("Customer Lifetime Value")
-    avg_treatment = 4500
-    treatments = 3
-    referral_rate = 0.3
-    
-    clv_direct = avg_treatment * treatments
-    clv_referral = avg_treatment * referral_rate
-    total_clv = clv_direct + clv_referral
-    
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Direct Revenue", f"${clv_direct:,.0f}")
+        st.metric("Direct Revenue", CLV_DIRECT_STR)
     with col2:
-        st.metric("Referral Value", f"${clv_referral:,.0f}")
+        st.metric("Referral Value", CLV_REFERRAL_STR)
     with col3:
-        st.metric("Total CLV", f"${total_clv:,.0f}")
+        st.metric("Total CLV", CLV_TOTAL_STR)
+
+
+# Main Dashboard Tabs
+tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    "📊 Executive Dashboard",
+    "🎯 Lead Generation",
+    "🗺️ Territory Analysis",
+    "📈 Predictive Forecasts",
+    "👥 Customer Insights"
+])
+
+with tab1:
+    render_executive()
+
+with tab2:
+    render_lead_generation()
+
+with tab3:
+    render_territory()
+
+with tab4:
+    render_forecasts()
+
+with tab5:
+    render_customer_insights()
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import market_analysis as ma
+
+
+def test_scalar_call_returns_dict():
+    clv = ma.calculate_customer_lifetime_value()
+
+    assert clv == {
+        'direct_revenue': 13500,
+        'referral_value': 1350.0,
+        'total_clv': 14850.0,
+        'timespan_years': 15,
+    }
+    assert isinstance(clv, dict)
+
+
+def test_series_input_keeps_its_index():
+    costs = pd.Series([4500, 6000], index=pd.Index(['King', 'Pierce'], name='territory'))
+
+    clv = ma.calculate_customer_lifetime_value(costs, treatments=[3, 2])
+
+    assert clv.index.equals(costs.index)
+    assert clv['direct_revenue'].tolist() == [13500, 12000]
+    assert clv['timespan_years'].tolist() == [15, 10]
+    np.testing.assert_allclose(clv['total_clv'], [14850.0, 13800.0])
+
+
+def test_batch_matches_scalar_calls():
+    costs = [4500, 5200, 6000]
+    rates = [0.3, 0.25, 0.1]
+
+    clv = ma.calculate_customer_lifetime_value(costs, referral_rate=rates)
+
+    for row, cost, rate in zip(clv.itertuples(index=False), costs, rates):
+        expected = ma.calculate_customer_lifetime_value(cost, referral_rate=rate)
+        assert row._asdict() == pytest.approx(expected)
+
+
+def test_mismatched_lengths_raise():
+    with pytest.raises(ValueError):
+        ma.calculate_customer_lifetime_value([4500, 6000], treatments=[1, 2, 3])
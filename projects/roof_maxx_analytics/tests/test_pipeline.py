@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import market_analysis as ma
+
+
+@pytest.fixture(params=[True, False], ids=['numba', 'cython'])
+def rolling_engine(request, monkeypatch):
+    if request.param and not ma._HAS_NUMBA:
+        pytest.skip('numba is not installed')
+    monkeypatch.setattr(ma, '_HAS_NUMBA', request.param)
+    return request.param
+
+
+def test_funnel_counts_cumulate_up_the_funnel():
+    stages = ['Leads', 'Qualified', 'Closed', 'Proposal', 'Qualified', 'Leads']
+
+    counts = ma.calculate_funnel_counts(stages)
+
+    assert counts.index.tolist() == list(ma.FUNNEL_STAGES)
+    assert counts.tolist() == [6, 4, 2, 2, 1]
+
+
+def test_funnel_counts_ignore_unknown_stages():
+    counts = ma.calculate_funnel_counts(['Closed', 'Lost', None, 'Inspection'])
+
+    assert counts.tolist() == [2, 2, 2, 1, 1]
+
+
+def test_funnel_counts_empty_input():
+    counts = ma.calculate_funnel_counts([])
+
+    assert counts.index.tolist() == list(ma.FUNNEL_STAGES)
+    assert counts.tolist() == [0] * len(ma.FUNNEL_STAGES)
+
+
+def test_trailing_conversion_rate_with_duplicate_dates(rolling_engine):
+    # Several leads per day, territories interleaved
+    dates = pd.to_datetime(['2026-01-01'] * 3 + ['2026-01-02'] * 3 + ['2026-01-03'] * 2)
+    leads = pd.DataFrame({
+        'territory': ['A', 'B', 'A', 'A', 'B', 'B', 'A', 'B'],
+        'converted': [True, False, False, True, True, False, False, True],
+    }, index=dates)
+
+    rates = ma.trailing_conversion_rate(leads, window=2)
+
+    # A: 1, 0, 1, 0 -> 1, 1/2, 1/2, 1/2; B: 0, 1, 0, 1 -> 0, 1/2, 1/2, 1/2
+    expected = [1.0, 0.0, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5]
+    assert rates.index.equals(leads.index)
+    np.testing.assert_allclose(rates.to_numpy(), expected)
+
+
+def test_trailing_conversion_rate_engines_agree(monkeypatch):
+    if not ma._HAS_NUMBA:
+        pytest.skip('numba is not installed')
+
+    rng = np.random.default_rng(0)
+    leads = pd.DataFrame({
+        'territory': rng.choice(['King', 'Pierce', 'Spokane'], 500),
+        'converted': rng.random(500) < 0.3,
+    }, index=pd.to_datetime('2026-01-01') + pd.to_timedelta(rng.integers(0, 60, 500), 'D'))
+
+    numba_rates = ma.trailing_conversion_rate(leads)
+    monkeypatch.setattr(ma, '_HAS_NUMBA', False)
+    cython_rates = ma.trailing_conversion_rate(leads)
+
+    pd.testing.assert_series_equal(numba_rates, cython_rates)
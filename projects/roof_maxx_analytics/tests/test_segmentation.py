@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import market_analysis as ma
+
+
+def test_tied_values_get_equal_scores():
+    customers = pd.DataFrame({
+        'recency': [10] * 10,
+        'frequency': [2] * 10,
+        'monetary': [9000] * 10,
+    })
+
+    segmented = ma.segment_customer_base(customers)
+
+    for col in ('r_score', 'f_score', 'm_score', 'segment'):
+        assert segmented[col].nunique() == 1
+
+
+def test_equal_frequency_shares_a_score():
+    rng = np.random.default_rng(0)
+    customers = pd.DataFrame({
+        'recency': rng.integers(1, 2000, 200),
+        'frequency': rng.integers(1, 4, 200),
+        'monetary': rng.integers(4500, 13500, 200),
+    })
+
+    segmented = ma.segment_customer_base(customers)
+
+    assert (segmented.groupby('frequency')['f_score'].nunique() == 1).all()
+    for col in ('r_score', 'f_score', 'm_score'):
+        assert segmented[col].between(0, ma.RFM_BINS - 1).all()
+
+
+def test_known_input_maps_to_known_segments():
+    customers = pd.DataFrame({
+        'recency': [1, 2, 3, 4, 5],
+        'frequency': [5, 1, 4, 2, 3],
+        'monetary': [5, 3, 1, 2, 4],
+    })
+
+    segmented = ma.segment_customer_base(customers)
+
+    assert segmented['r_score'].tolist() == [4, 3, 2, 1, 0]
+    assert segmented['f_score'].tolist() == [4, 0, 3, 1, 2]
+    assert segmented['m_score'].tolist() == [4, 2, 0, 1, 3]
+    assert segmented['segment'].tolist() == [
+        'Champions', 'New Customers', 'Loyal', 'At Risk', 'Cant Lose']
+
+
+def test_input_frame_is_not_modified():
+    customers = pd.DataFrame({'recency': [1, 2], 'frequency': [1, 2], 'monetary': [1, 2]})
+
+    ma.segment_customer_base(customers)
+
+    assert list(customers.columns) == ['recency', 'frequency', 'monetary']
+
+
+def test_empty_frame():
+    customers = pd.DataFrame({'recency': [], 'frequency': [], 'monetary': []})
+
+    segmented = ma.segment_customer_base(customers)
+
+    assert segmented.empty
+    assert {'r_score', 'f_score', 'm_score', 'segment'} <= set(segmented.columns)
+
+
+def test_nan_raises():
+    customers = pd.DataFrame({
+        'recency': [1, 2, 3],
+        'frequency': [1, 2, 3],
+        'monetary': [4500, np.nan, 9000],
+    })
+
+    with pytest.raises(ValueError, match='monetary'):
+        ma.segment_customer_base(customers)
+
+
+def test_missing_column_raises():
+    customers = pd.DataFrame({'recency': [1, 2], 'frequency': [1, 2]})
+
+    with pytest.raises(ValueError, match='monetary'):
+        ma.segment_customer_base(customers)
+
+
+def test_none_returns_segment_descriptions():
+    assert ma.segment_customer_base(None) == ma.CUSTOMER_SEGMENTS
+
+
+def _average_value_both_paths(segmented, monkeypatch):
+    if ma.numbagg is None:
+        pytest.skip('numbagg is not installed')
+    numbagg_means = ma.segment_average_value(segmented)
+    monkeypatch.setattr(ma, 'numbagg', None)
+    return numbagg_means, ma.segment_average_value(segmented)
+
+
+def test_segment_average_value_paths_agree(monkeypatch):
+    segmented = pd.DataFrame({
+        'segment': ['Champions', 'Loyal', 'Champions', 'At Risk', 'Hibernating'],
+        'monetary': [13500, 9000, 9000, 4500, 99999],
+    })
+
+    numbagg_means, pandas_means = _average_value_both_paths(segmented, monkeypatch)
+
+    pd.testing.assert_series_equal(numbagg_means, pandas_means)
+    assert numbagg_means.index.tolist() == list(ma.CUSTOMER_SEGMENTS)
+    assert numbagg_means.index.name == 'segment'
+    assert numbagg_means.name == 'monetary'
+    assert numbagg_means['Champions'] == 11250
+    # Empty segments are NaN and labels outside CUSTOMER_SEGMENTS are dropped
+    assert numbagg_means[['Potential Loyalists', 'New Customers', 'Cant Lose']].isna().all()
+    assert 'Hibernating' not in numbagg_means.index
+
+
+def test_segment_average_value_on_segmented_customers(monkeypatch):
+    rng = np.random.default_rng(1)
+    customers = pd.DataFrame({
+        'recency': rng.integers(1, 2000, 300),
+        'frequency': rng.integers(1, 4, 300),
+        'monetary': rng.integers(4500, 13500, 300),
+    })
+    segmented = ma.segment_customer_base(customers)
+
+    numbagg_means, pandas_means = _average_value_both_paths(segmented, monkeypatch)
+
+    pd.testing.assert_series_equal(numbagg_means, pandas_means)